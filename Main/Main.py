@@ -10,6 +10,9 @@ from http.server import HTTPServer, SimpleHTTPRequestHandler
 import threading
 import shutil
 import socket
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from validator import validate_site, record_validation
 
 # Set up logging
 logging.basicConfig(filename="debug.log", level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -116,6 +119,10 @@ if "prompt_history" not in st.session_state:
 if "server" not in st.session_state:
     st.session_state["server"] = None
 
+# Section-level regeneration attempts before falling back to the default template
+VALIDATION_RETRIES = 2
+VALIDATION_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "validation_log.jsonl")
+
 # Function to check if Ollama server is running
 def check_ollama_server():
     try:
@@ -285,6 +292,72 @@ def generate_website_code(prompt, style, framework):
         logging.warning(f"Generation failed: {str(e)}")
         return {"error": "Model response failure", "raw": ""}
 
+# Function to get the process pool used for site validation (one per app process, shared by all sessions)
+@st.cache_resource
+def get_validation_pool():
+    pool = ProcessPoolExecutor(max_workers=3)
+    atexit.register(pool.shutdown)
+    return pool
+
+# Function to regenerate a single section (html, css or js) that failed validation
+def regenerate_section(prompt, style, framework, code, section, errors):
+    delimiter = f"---{section.upper()}---"
+    full_prompt = f"""
+    You are an expert web developer. The website below was generated for the description "{prompt}" in the {style} style (CSS framework: {framework}).
+    Its {section.upper()} section failed validation with these problems:
+    {chr(10).join("- " + error for error in errors)}
+    Rewrite only the {section.upper()} section so that it fixes every problem and still works with the other sections.
+    The HTML must link styles.css and script.js (unless using a CSS framework) and must not reference any other local files.
+    Return the raw code after the delimiter {delimiter}. Do not include markdown, code fences, explanations, or tags like <think>.
+    ---HTML---
+    {code["html"]}
+    ---CSS---
+    {code["css"]}
+    ---JS---
+    {code["js"]}
+    """
+    try:
+        response = ollama.chat(
+            model="llama3.2:latest",
+            messages=[{"role": "user", "content": full_prompt}],
+            options={"temperature": 0.8}
+        )
+        content = response["message"]["content"]
+        content = re.sub(r'<think>.*?</think>|<think>|</think>', '', content, flags=re.DOTALL)
+        content = content.split(delimiter, 1)[-1]
+        content = re.split(r'---(?:HTML|CSS|JS)---', content)[0]
+        match = re.search(r"```[a-zA-Z]*\n([\s\S]*?)```", content)
+        content = (match.group(1) if match else content).strip()
+        logging.debug(f"Regenerated {section}: {content[:500]}")
+        return content or None
+    except Exception as e:
+        logging.warning(f"Section regeneration failed: {str(e)}")
+        return None
+
+# Function to validate generated code and regenerate failing sections
+def validate_and_repair(prompt, style, framework, code):
+    code = dict(code)
+    required = ("styles.css", "script.js") if framework == "None" else ()
+    for attempt in range(VALIDATION_RETRIES + 1):
+        report = validate_site(code, required=required, pool=get_validation_pool())
+        record_validation(report, prompt, VALIDATION_LOG)
+        logging.debug(f"Validation report (attempt {attempt + 1}): {report}")
+        if report["warnings"]:
+            st.info(f"Validation warnings (not blocking): {'; '.join(report['warnings'][:3])}")
+        if report["ok"]:
+            return code
+        if attempt == VALIDATION_RETRIES:
+            break
+        for section, errors in report["errors"].items():
+            if errors:
+                st.warning(f"{section.upper()} failed validation: {'; '.join(errors[:3])}. Regenerating {section.upper()}...")
+                section_code = regenerate_section(prompt, style, framework, code, section, errors)
+                if section_code:
+                    code[section] = section_code
+    st.error("Generated website failed validation. Using default template.")
+    logging.debug("Falling back to default template due to validation failure.")
+    return DEFAULT_WEBSITE
+
 # Agent to compile and save website files
 def compile_website(code, output_dir="output"):
     if "error" in code:
@@ -380,6 +453,8 @@ if st.button("Force Pull Model"):
             st.error(f"Failed to pull model: {e.stderr}")
             logging.error(f"Failed to pull model: {e.stderr}\nCommand output: {e.stdout}")
 
+validate_output = st.checkbox("Validate generated site before preview", value=True)
+
 # Generate button
 if st.button("Generate Website"):
     with st.spinner("Checking model availability..."):
@@ -393,6 +468,9 @@ if st.button("Generate Website"):
             st.error(code["error"])
             st.warning("Using default website template due to generation failure.")
             code = DEFAULT_WEBSITE
+        elif validate_output:
+            with st.spinner("Validating website..."):
+                code = validate_and_repair(prompt_input, style, framework, code)
         
         st.subheader("Generated Code")
         st.code(code["html"], language="html")
@@ -6,28 +6,134 @@ import subprocess
 from pathlib import Path
 import re
 import time
+import json
+import threading
+import queue
+import atexit
+from urllib.parse import urlsplit
+from validator import validate_site, record_validation
 
 # File System Setup
 WORKING_DIR = "workspace"
 Path(WORKING_DIR).mkdir(exist_ok=True)
 TASK_HISTORY = []
 
+# Single-Call Mode: ask for filename and code in one request instead of two
+SINGLE_CALL_MODE = True
+TASK_OUTPUT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "filename": {"type": "string"},
+        "code": {"type": "string"}
+    },
+    "required": ["filename", "code"]
+}
+
+# Output Validation: static checks on the generated page, with one regeneration on failure
+VALIDATE_OUTPUT = True
+
+# Workspace Snapshots: a background thread commits each task's output to a side branch
+SNAPSHOT_BRANCH = "refs/heads/agent-snapshots"
+SNAPSHOT_INDEX = "snapshot_index.txt"  # kept in .git, one "commit<TAB>parent<TAB>file<TAB>task" line per snapshot
+SNAPSHOT_QUEUE = queue.Queue()
+SNAPSHOT_MESSAGES = queue.Queue()  # worker -> Tk main thread; only the main thread touches widgets
+SNAPSHOTS = {}  # task -> (commit, parent, filename), latest snapshot wins
+GIT_LOCK = threading.Lock()
+GIT_STREAM = {"process": None, "tip": None, "mark": 0, "worker": None}
+
+# Reasoning Budget: deepseek-r1 emits <think> reasoning before the answer
+THINK_MODE = True          # sent as Ollama "think"; False skips reasoning entirely
+THINK_TOKEN_BUDGET = 1024  # cut the stream once reasoning exceeds this (None = unlimited)
+NUM_PREDICT = 4096         # hard cap on generated tokens per request
+CODE_NUM_PREDICT = 12288   # higher cap for requests that return a whole page
+
+# Read Streamed Ollama Chat, Counting Reasoning vs Output Tokens
+def read_ollama_stream(response, think_budget=None):
+    parts = []
+    think_tokens = output_tokens = 0
+    in_think = False
+    done_reason = None
+    for line in response.iter_lines():
+        if not line:
+            continue
+        chunk = json.loads(line)
+        if chunk.get("done"):
+            done_reason = chunk.get("done_reason")
+        message = chunk.get("message", {})
+        # Ollama reports reasoning separately when "think" is honoured...
+        if message.get("thinking"):
+            think_tokens += 1
+        piece = message.get("content", "")
+        if piece:
+            # ...older servers inline it as <think>...</think> in content
+            if "<think>" in piece:
+                in_think = True
+            if in_think:
+                think_tokens += 1
+            else:
+                output_tokens += 1
+            if "</think>" in piece:
+                in_think = False
+            parts.append(piece)
+        reasoning = in_think or bool(message.get("thinking"))
+        if reasoning and think_budget is not None and think_tokens > think_budget:
+            return None, think_tokens, output_tokens, True, None
+    content = re.sub(r'<think>.*?</think>|<think>|</think>', '', "".join(parts), flags=re.DOTALL).strip()
+    return content, think_tokens, output_tokens, False, done_reason
+
+# Resolve OLLAMA_HOST the way the ollama client does: a bare host gets http and port 11434
+def parse_ollama_host(host):
+    scheme, _, hostport = host.partition("://")
+    port = 11434
+    if not hostport:
+        scheme, hostport = "http", host
+    elif scheme == "http":
+        port = 80
+    elif scheme == "https":
+        port = 443
+    split = urlsplit(f"{scheme}://{hostport}")
+    hostname = split.hostname or "127.0.0.1"
+    if ":" in hostname:
+        hostname = f"[{hostname}]"
+    return f"{scheme}://{hostname}:{split.port or port}{split.path.rstrip('/')}"
+
+# Ollama Endpoint (honours OLLAMA_HOST, e.g. to point at fake_ollama.py)
+OLLAMA_HOST = parse_ollama_host(os.environ.get("OLLAMA_HOST", "").strip() or "localhost:11434")
+
 # Ollama API Call with Retry
-def call_ollama(prompt, retries=3):
+def call_ollama(prompt, retries=3, response_format=None, think=None, num_predict=NUM_PREDICT):
+    if think is None:
+        think = THINK_MODE
+    payload = {
+        "model": "deepseek-r1:7b",
+        "messages": [{"role": "user", "content": prompt}],
+        "stream": True,
+        "think": think,
+        "options": {"num_predict": num_predict}
+    }
+    if response_format:
+        payload["format"] = response_format
     for attempt in range(retries):
         try:
-            response = requests.post(
-                "http://localhost:11434/api/chat",
-                json={
-                    "model": "deepseek-r1:7b",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "stream": False
-                },
+            with requests.post(
+                f"{OLLAMA_HOST}/api/chat",
+                json=payload,
+                stream=True,
                 timeout=30
-            )
-            response.raise_for_status()
-            return response.json()["message"]["content"]
-        except requests.RequestException as e:
+            ) as response:
+                response.raise_for_status()
+                content, think_tokens, output_tokens, truncated, done_reason = read_ollama_stream(response, THINK_TOKEN_BUDGET if think else None)
+            ratio = f"{think_tokens / output_tokens:.2f}" if output_tokens else "n/a"
+            append_output(f"AI Agent: Reasoning tokens: {think_tokens}, output tokens: {output_tokens} (reasoning/output ratio: {ratio})")
+            if truncated:
+                append_output(f"AI Agent: Reasoning exceeded {THINK_TOKEN_BUDGET} tokens. Retrying with thinking disabled.")
+                return call_ollama(prompt, retries, response_format, think=False, num_predict=num_predict)
+            if done_reason == "length":
+                # A reply cut at num_predict is half a page (or half a JSON string); never save it
+                append_output(f"AI Agent: Response hit the {num_predict}-token limit and was discarded as incomplete.")
+                return None
+            return content
+        except (requests.RequestException, ValueError) as e:
             append_output(f"AI Agent Error (Attempt {attempt+1}/{retries}): {e}. Ensure Ollama is running (OLLAMA_ORIGINS=* ollama serve).")
             if attempt == retries - 1:
                 return None
@@ -51,6 +157,34 @@ def parse_llm_response(response, type):
         return content if content.strip() else None
     return content
 
+# Parse Combined Filename + Code Response
+def parse_task_response(response):
+    if not response:
+        return None, None
+    content = re.sub(r'<think>.*?</think>|<think>|</think>', '', response, flags=re.DOTALL).strip()
+    raw_filename, raw_code = None, None
+    # JSON output (Ollama "format"), possibly wrapped in prose or a code fence
+    decoder = json.JSONDecoder()
+    start = content.find("{")
+    while start != -1:
+        try:
+            data, _ = decoder.raw_decode(content, start)
+        except ValueError:
+            start = content.find("{", start + 1)
+            continue
+        if isinstance(data, dict):
+            raw_filename, raw_code = data.get("filename"), data.get("code")
+        break
+    # Delimited output
+    if not (isinstance(raw_filename, str) and isinstance(raw_code, str)):
+        match = re.search(r"---FILENAME---\s*(.*?)\s*---CODE---\s*([\s\S]*)", content)
+        if not match:
+            return None, None
+        raw_filename, raw_code = match.group(1), match.group(2)
+    filename = parse_llm_response(re.sub(r'\.html?$', '', raw_filename.strip(), flags=re.IGNORECASE), "filename")
+    code = parse_llm_response(raw_code, "code")
+    return filename, code
+
 # Initialize Git Repository and Project Structure
 def init_git_repo():
     git_dir = f"{WORKING_DIR}/.git"
@@ -67,6 +201,190 @@ def init_git_repo():
         except FileNotFoundError:
             append_output("AI Agent: Git not found. Ensure 'git' is installed and in your PATH.")
 
+# Read the Snapshot Branch Tip Without Spawning Git
+def read_snapshot_tip():
+    ref_path = f"{WORKING_DIR}/.git/{SNAPSHOT_BRANCH}"
+    if os.path.exists(ref_path):
+        with open(ref_path) as f:
+            return f.read().strip() or None
+    packed_path = f"{WORKING_DIR}/.git/packed-refs"
+    if os.path.exists(packed_path):
+        with open(packed_path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == SNAPSHOT_BRANCH:
+                    return parts[0]
+    return None
+
+# Persistent git fast-import Process (caller must hold GIT_LOCK)
+def git_stream():
+    if GIT_STREAM["process"] is None:
+        GIT_STREAM["process"] = subprocess.Popen(
+            ["git", "fast-import", "--quiet"],
+            cwd=WORKING_DIR,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+        GIT_STREAM["tip"] = read_snapshot_tip()
+    return GIT_STREAM["process"]
+
+# Drop a Dead fast-import Process so the Next Call Starts a Fresh One (caller must hold GIT_LOCK)
+def reset_git_stream():
+    process = GIT_STREAM["process"]
+    GIT_STREAM["process"] = None
+    if process is not None:
+        process.kill()
+        process.wait()
+
+# Commit File Contents (path -> bytes, None = deleted) to the Snapshot Branch
+def snapshot_commit(message, files):
+    with GIT_LOCK:
+        process = git_stream()
+        GIT_STREAM["mark"] += 1
+        mark = GIT_STREAM["mark"]
+        parent = GIT_STREAM["tip"]
+        message = message.encode("utf-8")
+        stream = [
+            f"commit {SNAPSHOT_BRANCH}\nmark :{mark}\n".encode(),
+            f"committer AI Agent <agent@localhost> {int(time.time())} +0000\n".encode(),
+            f"data {len(message)}\n".encode() + message + b"\n"
+        ]
+        if parent:
+            stream.append(f"from {parent}\n".encode())
+        for path, content in files.items():
+            if content is not None:
+                stream.append(f"M 100644 inline {path}\ndata {len(content)}\n".encode() + content + b"\n")
+            else:
+                stream.append(f"D {path}\n".encode())
+        # "progress" is echoed once the checkpoint has written the pack and branch ref to disk
+        stream.append(f"\nget-mark :{mark}\ncheckpoint\nprogress checkpoint {mark}\n\n".encode())
+        try:
+            process.stdin.write(b"".join(stream))
+            process.stdin.flush()
+            commit = process.stdout.readline().decode().strip()
+            if not commit or not process.stdout.readline().startswith(b"progress"):
+                raise OSError("git fast-import exited unexpectedly")
+        except OSError:
+            reset_git_stream()
+            raise
+        GIT_STREAM["tip"] = commit
+        return commit, parent
+
+# Load Task -> Commit Lookup from the Snapshot Index
+def find_snapshot(task):
+    if not SNAPSHOTS:
+        index_path = f"{WORKING_DIR}/.git/{SNAPSHOT_INDEX}"
+        if os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as f:
+                for line in f:
+                    commit, parent, filename, logged_task = line.rstrip("\n").split("\t", 3)
+                    SNAPSHOTS[logged_task] = (commit, parent, filename)
+    return SNAPSHOTS.get(task)
+
+# Background Snapshot Worker
+def snapshot_worker():
+    find_snapshot(None)
+    while True:
+        item = SNAPSHOT_QUEUE.get()
+        try:
+            if item is None:
+                break
+            task, filename, files = item
+            try:
+                commit, parent = snapshot_commit(f"Task: {task}\nFile: {filename}", files)
+            except (OSError, ValueError) as e:
+                SNAPSHOT_MESSAGES.put(f"AI Agent: Failed to snapshot {filename}: {e}")
+                continue
+            SNAPSHOTS[task] = (commit, parent or "", filename)
+            with open(f"{WORKING_DIR}/.git/{SNAPSHOT_INDEX}", "a", encoding="utf-8") as index:
+                index.write(f"{commit}\t{parent or ''}\t{filename}\t{task}\n")
+            SNAPSHOT_MESSAGES.put(f"AI Agent: Snapshotted {filename} as {commit[:10]}")
+        finally:
+            SNAPSHOT_QUEUE.task_done()
+
+# Show Snapshot Worker Messages (polled from the Tk main loop)
+def drain_snapshot_messages():
+    while not SNAPSHOT_MESSAGES.empty():
+        append_output(SNAPSHOT_MESSAGES.get_nowait())
+    root.after(100, drain_snapshot_messages)
+
+# Queue a Task's Output for Snapshotting (contents are read now, not when the worker drains the queue)
+def queue_snapshot(task, filename):
+    if not os.path.exists(f"{WORKING_DIR}/.git"):
+        return
+    files = {}
+    for path in (filename, "task_log.txt"):
+        file_path = f"{WORKING_DIR}/{path}"
+        if os.path.exists(file_path):
+            with open(file_path, "rb") as f:
+                files[path] = f.read()
+        else:
+            files[path] = None
+    if GIT_STREAM["worker"] is None:
+        GIT_STREAM["worker"] = threading.Thread(target=snapshot_worker, daemon=True)
+        GIT_STREAM["worker"].start()
+    SNAPSHOT_QUEUE.put((task, filename, files))
+
+# Flush Pending Snapshots and Close git fast-import on Exit
+def close_snapshots():
+    if GIT_STREAM["worker"] is not None:
+        SNAPSHOT_QUEUE.put(None)
+        GIT_STREAM["worker"].join(timeout=10)
+    with GIT_LOCK:
+        process = GIT_STREAM["process"]
+        if process is not None:
+            try:
+                process.stdin.close()
+                process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                process.kill()
+            GIT_STREAM["process"] = None
+
+atexit.register(close_snapshots)
+
+# Roll Back a Task's Generated File to its Previous Snapshot
+def rollback_task(task, waiting=False):
+    # Let queued snapshots land first so the lookup sees the task's latest commit, polling so the UI stays live
+    if SNAPSHOT_QUEUE.unfinished_tasks:
+        if not waiting:
+            append_output("AI Agent: Waiting for pending snapshots...")
+        root.after(100, rollback_task, task, True)
+        return
+    snapshot = find_snapshot(task)
+    if not snapshot:
+        append_output(f"AI Agent: No snapshot found for task: {task}")
+        return
+    commit, parent, filename = snapshot
+    file_path = f"{WORKING_DIR}/{filename}"
+    content = None
+    with GIT_LOCK:
+        try:
+            process = git_stream()
+            if parent:
+                process.stdin.write(f"ls {parent} {filename}\n".encode())
+                process.stdin.flush()
+                entry = process.stdout.readline().decode()
+                if not entry.startswith("missing"):
+                    blob = entry.split()[2]
+                    process.stdin.write(f"cat-blob {blob}\n".encode())
+                    process.stdin.flush()
+                    size = int(process.stdout.readline().split()[2])
+                    content = process.stdout.read(size)
+                    process.stdout.read(1)
+        except (OSError, ValueError, IndexError) as e:
+            reset_git_stream()
+            append_output(f"AI Agent: Failed to roll back {filename}: {e}")
+            return
+    if content is None:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        append_output(f"AI Agent: Rolled back {filename} (removed; it did not exist before {commit[:10]})")
+    else:
+        with open(file_path, "wb") as f:
+            f.write(content)
+        append_output(f"AI Agent: Rolled back {filename} to its state before {commit[:10]}")
+    queue_snapshot(f"Rollback: {task}", filename)
+
 # AI Agent: Create File
 def create_file(task):
     prompt = f'Suggest an HTML filename for the task "{task}" (e.g., "index.html"). Return only the filename inside triple backticks, no extra text:\n```\nfilename\n```'
@@ -76,6 +394,10 @@ def create_file(task):
     if not filename:
         filename = f"task_{int(time.time())}.html"
         append_output("AI Agent: Fallback filename used due to invalid or missing AI response.")
+    return reserve_file(filename)
+
+# Create an Empty File, Falling Back to a Timestamped Name
+def reserve_file(filename):
     file_path = f"{WORKING_DIR}/{filename}"
     try:
         if not os.path.exists(file_path):
@@ -98,8 +420,8 @@ def create_file(task):
         return None
 
 # AI Agent: Write HTML Code with Inline CSS/JS
-def write_code(task, filename):
-    prompt = f'''
+def code_prompt(task, filename):
+    return f'''
 Write HTML code for the task "{task}" to be saved in {filename}. Include inline CSS in <style> tags and JavaScript in <script> tags within the HTML. Return only the code inside triple backticks, no extra text. Example:
 ```
 <!DOCTYPE html>
@@ -125,7 +447,9 @@ For task "{task}":
 code
 ```
 '''
-    response = call_ollama(prompt)
+
+def write_code(task, filename):
+    response = call_ollama(code_prompt(task, filename), num_predict=CODE_NUM_PREDICT)
     append_output(f"AI Agent: Raw code response: {response}")
     code = parse_llm_response(response, "code")
     if not code:
@@ -148,15 +472,74 @@ code
 </html>
 '''
         append_output("AI Agent: Fallback code used due to invalid or missing AI response.")
+    return save_code(task, filename, code)
+
+# Save Code and Log Task
+def save_code(task, filename, code, log_task=True):
     file_path = f"{WORKING_DIR}/{filename}"
     with open(file_path, "w") as f:
         f.write(code)
     append_output(f"AI Agent: Wrote code to {filename}")
-    with open(f"{WORKING_DIR}/task_log.txt", "a") as log:
-        log.write(f"Task: {task}\nFile: {filename}\nTimestamp: {time.ctime()}\n\n")
-    append_output("AI Agent: Logged task to task_log.txt")
+    if log_task:
+        with open(f"{WORKING_DIR}/task_log.txt", "a") as log:
+            log.write(f"Task: {task}\nFile: {filename}\nTimestamp: {time.ctime()}\n\n")
+        append_output("AI Agent: Logged task to task_log.txt")
     return code
 
+# AI Agent: Validate Generated Page, Regenerating Once on Failure
+def validate_code(task, filename, code):
+    report = validate_site({"html": code}, available=())
+    record_validation(report, filename, f"{WORKING_DIR}/validation_log.jsonl")
+    if report["warnings"]:
+        append_output(f"AI Agent: Validation warnings (not blocking): {'; '.join(report['warnings'][:5])}")
+    if report["ok"]:
+        append_output(f"AI Agent: Validation passed ({report['metrics']['elements']} elements, {report['metrics']['validation_ms']} ms)")
+        return code
+    errors = [error for section_errors in report["errors"].values() for error in section_errors]
+    append_output(f"AI Agent: Validation failed: {'; '.join(errors[:5])}. Regenerating code.")
+    prompt = code_prompt(task, filename) + "A previous attempt failed validation. Fix these problems:\n" + "\n".join(f"- {error}" for error in errors)
+    response = call_ollama(prompt, num_predict=CODE_NUM_PREDICT)
+    append_output(f"AI Agent: Raw code response: {response}")
+    new_code = parse_llm_response(response, "code")
+    if not new_code:
+        append_output("AI Agent: Regeneration returned no code. Keeping the original page.")
+        return code
+    new_report = validate_site({"html": new_code}, available=())
+    record_validation(new_report, filename, f"{WORKING_DIR}/validation_log.jsonl")
+    new_errors = [error for section_errors in new_report["errors"].values() for error in section_errors]
+    if len(new_errors) > len(errors):
+        append_output(f"AI Agent: Regenerated code has more problems ({len(new_errors)} vs {len(errors)}). Keeping the original page.")
+        return code
+    # Already logged for this task; only rewrite the file
+    save_code(task, filename, new_code, log_task=False)
+    if new_errors:
+        append_output("AI Agent: Regenerated code still fails validation. Review it before previewing.")
+    return new_code
+
+# AI Agent: Create File and Write Code in a Single Call
+# Returns (filename, code, fallback); fallback is True when the two-call path should run instead
+def create_file_and_code(task):
+    prompt = f'''
+For the task "{task}", suggest an HTML filename (e.g., "index.html") and write the HTML code for it. Include inline CSS in <style> tags and JavaScript in <script> tags within the HTML.
+Return only a JSON object with exactly two string fields, no extra text:
+{{"filename": "index.html", "code": "<!DOCTYPE html>..."}}
+If you cannot return JSON, use these delimiters instead:
+---FILENAME---
+index.html
+---CODE---
+<!DOCTYPE html>...
+'''
+    response = call_ollama(prompt, response_format=TASK_OUTPUT_SCHEMA, num_predict=CODE_NUM_PREDICT)
+    append_output(f"AI Agent: Raw combined response: {response}")
+    filename, code = parse_task_response(response)
+    if not filename or not code:
+        append_output("AI Agent: Invalid or missing combined response. Falling back to separate filename and code requests.")
+        return None, None, True
+    filename = reserve_file(filename)
+    if not filename:
+        return None, None, False
+    return filename, save_code(task, filename, code), False
+
 # Run Live Server
 def run_live_server(filename):
     try:
@@ -250,17 +633,29 @@ def execute_task():
     # Step 1: Initialize Git Repository
     init_git_repo()
 
-    # Step 2: Create File
-    filename = create_file(task)
-    if not filename:
-        return
+    # Step 2 + 3: Create File and Write Code in one LLM call
+    filename, code, fallback = create_file_and_code(task) if SINGLE_CALL_MODE else (None, None, True)
+    if fallback:
+        # Step 2: Create File
+        filename = create_file(task)
+        if not filename:
+            return
 
-    # Step 3: Write Code
-    code = write_code(task, filename)
-    if not code:
+        # Step 3: Write Code
+        code = write_code(task, filename)
+        if not code:
+            return
+    elif not filename:
         return
 
-    # Step 4: Open VS Code in New Window
+    # Step 4: Validate Output
+    if VALIDATE_OUTPUT:
+        code = validate_code(task, filename, code)
+
+    # Step 5: Snapshot Output in the Background
+    queue_snapshot(task, filename)
+
+    # Step 6: Open VS Code in New Window
     open_vscode(filename)
 
 # Clear Chat Output
@@ -313,10 +708,13 @@ run_button = tk.Button(button_frame, text="Run Live Server", command=lambda: run
 run_button.pack(side='left', padx=5)
 clear_button = tk.Button(button_frame, text="Clear Output", command=clear_output, bg="#007acc", fg="white", font=("Consolas", 12))
 clear_button.pack(side='left', padx=5)
+rollback_button = tk.Button(button_frame, text="Roll Back", command=lambda: rollback_task(task_dropdown.get() if task_dropdown.get() else task_input.get()), bg="#007acc", fg="white", font=("Consolas", 12))
+rollback_button.pack(side='left', padx=5)
 
 # Chat Output
 chat_output = scrolledtext.ScrolledText(root, height=20, width=80, state='disabled', wrap=tk.WORD, bg="#1e1e1e", fg="#d4d4d4", font=("Consolas", 12))
 chat_output.pack(pady=10, padx=10)
 
 # Start UI
+drain_snapshot_messages()
 root.mainloop()
\ No newline at end of file
@@ -0,0 +1,303 @@
+import argparse
+import ast
+import itertools
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from http.server import HTTPServer, ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from fake_ollama import PROFILES, DEFAULT_RECORDING, load_recording, start_fake_ollama
+from validator import validate_site, record_validation
+
+# End-to-end latency benchmark for both front ends against fake_ollama.py.
+# Each scenario runs the real functions from Main.py / Main1.py, loaded without starting their UIs.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TASK = "Create a Chatbot UI using HTML"
+PROMPT = "Create a chatbot UI with a message input and chat history."
+
+# Functions and constants each front end contributes to its scenario
+TK_NAMES = {
+    "THINK_MODE", "THINK_TOKEN_BUDGET", "NUM_PREDICT", "CODE_NUM_PREDICT", "TASK_OUTPUT_SCHEMA",
+    "read_ollama_stream", "call_ollama", "parse_llm_response", "parse_task_response",
+    "reserve_file", "save_code", "code_prompt", "write_code", "validate_code", "create_file_and_code"
+}
+STREAMLIT_NAMES = {
+    "DEFAULT_WEBSITE", "VALIDATION_RETRIES",
+    "check_ollama_server", "get_example", "extract_code", "generate_website_code",
+    "regenerate_section", "validate_and_repair", "compile_website"
+}
+MODEL_NAMES = {"check_ollama_server", "ensure_model"}
+PREVIEW_NAMES = {"DEFAULT_WEBSITE", "compile_website", "find_free_port", "start_server", "stop_server"}
+PULLED_MODELS = itertools.count(1)
+
+# Headless Stand-in for st / append_output: collects messages instead of drawing them
+class HeadlessUI:
+    def __init__(self):
+        self.messages = []
+        self.session_state = {}
+
+    def record(self, message):
+        self.messages.append(message)
+
+    error = warning = info = success = write = record
+
+# Compile Selected Top-Level Definitions from a Front-End Script
+def compile_script(filename, names):
+    with open(os.path.join(HERE, filename), encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename)
+    nodes = []
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name in names:
+            nodes.append(node)
+        elif isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id in names for t in node.targets):
+            nodes.append(node)
+    found = {getattr(node, "name", None) or node.targets[0].id for node in nodes}
+    if found != names:
+        raise SystemExit(f"{filename} is missing: {', '.join(sorted(names - found))}")
+    return compile(ast.Module(nodes, type_ignores=[]), filename, "exec")
+
+# Preview Server Handler without Per-Request Logging
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+# Preview Server Stand-in for the Streamlit scenario: one per scenario, so concurrent requests can share it.
+# It serves the same SimpleHTTPRequestHandler as Main.py's start_server, but threaded and without chdir;
+# the preview scenario covers start_server / stop_server themselves.
+def start_preview_server(directory):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=directory))
+    server.daemon_threads = True
+    server.directory = directory
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# Nearest-Rank Percentile
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+# Tk Agent: single-call generation, parse, save, validate
+def tk_request(code_object, ollama_url, workdir):
+    import requests
+    ui = HeadlessUI()
+    namespace = {
+        "requests": requests, "re": re, "json": json, "time": time, "os": os,
+        "validate_site": validate_site, "record_validation": record_validation,
+        "append_output": ui.record, "OLLAMA_HOST": ollama_url,
+        "WORKING_DIR": tempfile.mkdtemp(dir=workdir)
+    }
+    exec(code_object, namespace)
+    filename, code, fallback = namespace["create_file_and_code"](TASK)
+    if fallback or not filename:
+        raise RuntimeError(f"Tk pipeline produced no file: {ui.messages[-3:]}")
+    namespace["validate_code"](TASK, filename, code)
+
+# Streamlit App: generation, validation, compile, then fetch the files through the preview server
+def streamlit_request(code_object, pool, preview):
+    import ollama
+    ui = HeadlessUI()
+    output_dir = tempfile.mkdtemp(dir=preview.directory)
+    namespace = {
+        "st": ui, "ollama": ollama, "re": re, "os": os, "logging": logging,
+        "validate_site": validate_site, "record_validation": record_validation,
+        "get_validation_pool": lambda: pool,
+        "VALIDATION_LOG": os.path.join(output_dir, "validation_log.jsonl")
+    }
+    exec(code_object, namespace)
+    code = namespace["generate_website_code"](PROMPT, "Modern Gradient", "None")
+    if "error" in code:
+        raise RuntimeError(f"Generation failed: {code['error']}")
+    code = namespace["validate_and_repair"](PROMPT, "Modern Gradient", "None", code)
+    result = namespace["compile_website"](code, os.path.join(output_dir, "site"))
+    if "successfully" not in result:
+        raise RuntimeError(result)
+    site_url = f"{preview.url}/{os.path.basename(output_dir)}/site"
+    for name in ("index.html", "styles.css", "script.js"):
+        urllib.request.urlopen(f"{site_url}/{name}", timeout=10).read()
+
+# Model Checks: Main.py's ensure_model for a model the server lacks, so every request lists, runs
+# `ollama pull` through the CLI (which reads OLLAMA_HOST) and lists again, as Force Pull does
+def models_request(code_object):
+    import ollama
+    ui = HeadlessUI()
+    ui.session_state["model_confirmed"] = False
+    namespace = {"st": ui, "ollama": ollama, "shutil": shutil, "subprocess": subprocess, "logging": logging}
+    exec(code_object, namespace)
+    if not namespace["ensure_model"](f"bench-pull-{next(PULLED_MODELS)}:latest"):
+        raise RuntimeError(ui.messages[-1])
+
+# Preview: Main.py's start_server on a compiled site, fetch its files, then stop_server once timing ends.
+# start_server chdirs into "output" (the handler serves the cwd) and binds ports 7000-7010,
+# so this scenario always runs one request at a time and restores the cwd in its teardown.
+def preview_request(code_object, site_root):
+    ui = HeadlessUI()
+    ui.session_state["server"] = None
+    namespace = {
+        "st": ui, "os": os, "socket": socket, "threading": threading,
+        "HTTPServer": HTTPServer, "SimpleHTTPRequestHandler": QuietHandler
+    }
+    exec(code_object, namespace)
+    cwd = os.getcwd()
+
+    def teardown():
+        try:
+            if ui.session_state["server"]:
+                namespace["stop_server"]()
+        finally:
+            os.chdir(cwd)
+
+    os.chdir(site_root)
+    try:
+        port = namespace["start_server"]()
+        if not port:
+            raise RuntimeError(ui.messages[-1])
+        for name in ("index.html", "styles.css", "script.js"):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/{name}", timeout=10).read()
+    except Exception:
+        teardown()
+        raise
+    return teardown
+
+# Run One Scenario under Concurrent Load (a request may return a teardown callable, run untimed)
+def run_scenario(name, request, requests_count, concurrency, warmup):
+    for _ in range(warmup):
+        teardown = request()
+        if teardown:
+            teardown()
+    latencies = []
+    errors = []
+
+    def timed():
+        start = time.perf_counter()
+        try:
+            teardown = request()
+        except Exception as e:
+            errors.append(str(e))
+            return
+        latencies.append(time.perf_counter() - start)
+        if teardown:
+            try:
+                teardown()
+            except Exception as e:
+                errors.append(f"teardown: {e}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(requests_count):
+            executor.submit(timed)
+    wall = time.perf_counter() - start
+    return {
+        "scenario": name,
+        "requests": requests_count,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0
+    }
+
+# Compare p95 and Throughput Against a Previous --output File
+def find_regressions(results, baseline_path, tolerance):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {entry["scenario"]: entry for entry in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["scenario"])
+        if previous and result["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{result['scenario']}: p95 {result['p95_ms']} ms vs baseline {previous['p95_ms']} ms")
+        if previous and result["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{result['scenario']}: throughput {result['throughput_rps']} req/s vs baseline {previous['throughput_rps']} req/s")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark both front ends against a replaying fake Ollama server.")
+    parser.add_argument("--scenario", choices=["tk", "streamlit", "models", "preview", "all"], default="all")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="instant")
+    parser.add_argument("--recording", default=DEFAULT_RECORDING)
+    parser.add_argument("--output", help="write results as JSON (usable as a later --baseline)")
+    parser.add_argument("--baseline", help="fail if any scenario's p95 or throughput regresses past --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server = start_fake_ollama(load_recording(args.recording), args.profile)
+    # The ollama client reads OLLAMA_HOST when first imported, so set it before any scenario runs
+    os.environ["OLLAMA_HOST"] = server.url
+    scenarios = ["tk", "streamlit", "models", "preview"] if args.scenario == "all" else [args.scenario]
+    results = []
+    with tempfile.TemporaryDirectory() as workdir, ProcessPoolExecutor(max_workers=3) as pool:
+        for name in scenarios:
+            preview = None
+            concurrency = args.concurrency
+            try:
+                if name == "tk":
+                    import requests  # noqa: F401
+                    request = partial(tk_request, compile_script("Main1.py", TK_NAMES), server.url, workdir)
+                elif name == "streamlit":
+                    import ollama  # noqa: F401
+                    site_root = tempfile.mkdtemp(dir=workdir)
+                    preview = start_preview_server(site_root)
+                    request = partial(streamlit_request, compile_script("Main.py", STREAMLIT_NAMES), pool, preview)
+                elif name == "models":
+                    import ollama  # noqa: F401
+                    if not shutil.which("ollama"):
+                        raise ImportError("ensure_model pulls through the ollama CLI, which is not on PATH")
+                    request = partial(models_request, compile_script("Main.py", MODEL_NAMES))
+                else:
+                    code_object = compile_script("Main.py", PREVIEW_NAMES)
+                    site_root = tempfile.mkdtemp(dir=workdir)
+                    namespace = {"os": os}
+                    exec(code_object, namespace)
+                    namespace["compile_website"](namespace["DEFAULT_WEBSITE"], os.path.join(site_root, "output"))
+                    request = partial(preview_request, code_object, site_root)
+                    concurrency = 1
+            except ImportError as e:
+                print(f"{name:<10} skipped: {e}")
+                continue
+            try:
+                result = run_scenario(name, request, args.requests, concurrency, args.warmup)
+            finally:
+                if preview is not None:
+                    preview.shutdown()
+                    preview.server_close()
+            results.append(result)
+            print(f"{name:<10} n={result['requests']} c={result['concurrency']} errors={result['errors']} "
+                  f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+                  f"throughput={result['throughput_rps']} req/s")
+            if result["first_error"]:
+                print(f"{'':<10} first error: {result['first_error']}")
+    server.shutdown()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"profile": args.profile, "results": results}, f, indent=4)
+    failed = any(result["errors"] for result in results)
+    if args.baseline:
+        regressions = find_regressions(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        failed = failed or bool(regressions)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
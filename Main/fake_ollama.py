@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Replays recorded Ollama responses so the agents can run without a live server or pulled models.
+# Point either front end at it with OLLAMA_HOST=http://127.0.0.1:<port>.
+
+DEFAULT_RECORDING = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings", "default.json")
+
+# Latency profiles: seconds before the first token, and decode speed (None = as fast as possible)
+PROFILES = {
+    "instant": {"latency": 0.0, "tokens_per_second": None},
+    "local-gpu": {"latency": 0.15, "tokens_per_second": 60},
+    "local-cpu": {"latency": 0.8, "tokens_per_second": 12}
+}
+
+# Load a Recording File
+def load_recording(path=DEFAULT_RECORDING):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+# Split Text into Token-Sized Chunks (words plus trailing whitespace)
+def tokenize(text):
+    return re.findall(r"\S+\s*|\s+", text)
+
+# Pick the Recorded Chat Reply whose "match" Appears in the Last User Message
+def match_chat(recording, messages):
+    prompt = messages[-1].get("content", "") if messages else ""
+    for entry in recording["chat"]:
+        if entry.get("match", "") in prompt:
+            return entry
+    return recording["chat"][-1]
+
+# Request Handler Serving /api/chat, /api/tags, /api/pull and /api/version
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    # The ollama CLI sends a heartbeat before every command
+    def do_HEAD(self):
+        self.send_response(200 if self.path == "/" else 404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path == "/":
+            self.send_text("Ollama is running")
+        elif self.path == "/api/tags":
+            tags = self.server.recording["tags"]
+            self.send_json({**tags, "models": tags["models"] + list(self.server.pulled.values())})
+        elif self.path == "/api/version":
+            self.send_json({"version": "0.0.0-fake"})
+        else:
+            self.send_json({"error": f"unknown endpoint {self.path}"}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_json({"error": "invalid JSON body"}, status=400)
+            return
+        if self.path == "/api/chat":
+            self.handle_chat(body)
+        elif self.path == "/api/pull":
+            self.handle_pull(body)
+        else:
+            self.send_json({"error": f"unknown endpoint {self.path}"}, status=404)
+
+    def handle_chat(self, body):
+        entry = match_chat(self.server.recording, body.get("messages", []))
+        model = body.get("model", "llama3.2:latest")
+        think = body.get("think")
+        thinking = entry.get("thinking", "")
+        content = entry.get("content", "")
+        # deepseek-r1 inlines reasoning unless the client asks for it separately
+        if thinking and think is None:
+            content = f"<think>\n{thinking}\n</think>\n\n{content}"
+        if think is not True:
+            thinking = ""
+        limit = (body.get("options") or {}).get("num_predict")
+        chunks = [("thinking", token) for token in tokenize(thinking)] + [("content", token) for token in tokenize(content)]
+        done_reason = "stop"
+        if limit and 0 < limit < len(chunks):
+            chunks = chunks[:limit]
+            done_reason = "length"
+        profile = self.server.profile
+        if not body.get("stream", True):
+            self.pace(len(chunks))
+            message = {"role": "assistant", "content": "".join(t for kind, t in chunks if kind == "content")}
+            if think is True:
+                message["thinking"] = "".join(t for kind, t in chunks if kind == "thinking")
+            self.send_json(self.chat_chunk(model, message, done=True, eval_count=len(chunks), done_reason=done_reason))
+            return
+        self.start_stream()
+        time.sleep(profile["latency"])
+        try:
+            for kind, token in chunks:
+                message = {"role": "assistant", "content": token if kind == "content" else ""}
+                if kind == "thinking":
+                    message["thinking"] = token
+                self.write_line(self.chat_chunk(model, message))
+                if profile["tokens_per_second"]:
+                    time.sleep(1 / profile["tokens_per_second"])
+            self.write_line(self.chat_chunk(model, {"role": "assistant", "content": ""}, done=True, eval_count=len(chunks), done_reason=done_reason))
+            self.end_stream()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cut the stream (e.g. think budget exceeded)
+            self.close_connection = True
+
+    def handle_pull(self, body):
+        statuses = self.server.recording["pull"]
+        # Pulled models show up in /api/tags afterwards, as they would on a real server
+        name = body.get("model") or body.get("name")
+        if name and not any(model["model"] == name for model in self.server.recording["tags"]["models"]):
+            self.server.pulled[name] = {**self.server.recording["tags"]["models"][0], "name": name, "model": name}
+        if not body.get("stream", True):
+            self.pace(len(statuses))
+            self.send_json(statuses[-1])
+            return
+        self.start_stream()
+        time.sleep(self.server.profile["latency"])
+        for status in statuses:
+            self.write_line(status)
+            if self.server.profile["tokens_per_second"]:
+                time.sleep(1 / self.server.profile["tokens_per_second"])
+        self.end_stream()
+
+    def chat_chunk(self, model, message, done=False, eval_count=0, done_reason="stop"):
+        chunk = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "message": message, "done": done}
+        if done:
+            chunk.update({"done_reason": done_reason, "total_duration": 0, "load_duration": 0, "prompt_eval_count": 0, "eval_count": eval_count, "eval_duration": 0})
+        return chunk
+
+    def pace(self, tokens):
+        profile = self.server.profile
+        delay = profile["latency"] + (tokens / profile["tokens_per_second"] if profile["tokens_per_second"] else 0)
+        time.sleep(delay)
+
+    def send_text(self, text, status=200):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, payload, status=200):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def write_line(self, payload):
+        data = json.dumps(payload).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+# Threaded Server that Stays Quiet when Clients Hang Up Early (e.g. think-budget cuts)
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError, ConnectionAbortedError)):
+            return
+        super().handle_error(request, client_address)
+
+# Start the Fake Server in a Background Thread (port 0 picks a free port)
+def start_fake_ollama(recording=None, profile="instant", host="127.0.0.1", port=0):
+    server = FakeOllamaServer((host, port), FakeOllamaHandler)
+    server.recording = recording if recording is not None else load_recording()
+    server.pulled = {}
+    server.profile = PROFILES[profile] if isinstance(profile, str) else profile
+    server.url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded Ollama responses on a local port.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--recording", default=DEFAULT_RECORDING)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="local-gpu")
+    args = parser.parse_args()
+    server = start_fake_ollama(load_recording(args.recording), args.profile, args.host, args.port)
+    print(f"Fake Ollama ({args.profile}) listening on {server.url}. Set OLLAMA_HOST={server.url} and press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
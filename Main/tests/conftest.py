@@ -0,0 +1,58 @@
+import json
+import os
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import TK_NAMES, HeadlessUI, compile_script
+from fake_ollama import load_recording, start_fake_ollama
+from validator import validate_site, record_validation
+
+SNAPSHOT_NAMES = {
+    "SNAPSHOT_BRANCH", "SNAPSHOT_INDEX", "SNAPSHOT_QUEUE", "SNAPSHOT_MESSAGES", "SNAPSHOTS", "GIT_LOCK", "GIT_STREAM",
+    "read_snapshot_tip", "git_stream", "reset_git_stream", "snapshot_commit", "find_snapshot",
+    "snapshot_worker", "queue_snapshot", "close_snapshots", "rollback_task"
+}
+
+# Tk Stand-in that Records root.after Calls Instead of Scheduling Them
+class FakeRoot:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, func, *args):
+        self.scheduled.append((func, args))
+
+# Load Main1.py's Agent Functions Headlessly, Pointed at a Fake Ollama Server
+@pytest.fixture
+def make_agent(tmp_path):
+    servers = []
+
+    def make(recording=None, names=TK_NAMES):
+        import requests
+        server = start_fake_ollama(recording if recording is not None else load_recording())
+        servers.append(server)
+        ui = HeadlessUI()
+        root = FakeRoot()
+        namespace = {
+            "requests": requests, "re": re, "json": json, "time": time, "os": os,
+            "queue": queue, "threading": threading, "subprocess": subprocess,
+            "validate_site": validate_site, "record_validation": record_validation,
+            "append_output": ui.record, "root": root,
+            "OLLAMA_HOST": server.url, "WORKING_DIR": str(tmp_path)
+        }
+        exec(compile_script("Main1.py", names), namespace)
+        namespace["ui"] = ui
+        namespace["fake_root"] = root
+        return namespace
+
+    yield make
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+@pytest.fixture
+def parse_task_response(make_agent):
+    return make_agent()["parse_task_response"]
+
+def test_plain_json(parse_task_response):
+    response = json.dumps({"filename": "chat.html", "code": "<p>Hi</p>"})
+    assert parse_task_response(response) == ("chat.html", "<p>Hi</p>")
+
+def test_json_wrapped_in_prose(parse_task_response):
+    response = 'Sure! Here it is:\n{"filename": "Chat UI", "code": "<p>{x}</p>"}\nHope this helps {}'
+    assert parse_task_response(response) == ("chat_ui.html", "<p>{x}</p>")
+
+def test_stray_braces_before_json(parse_task_response):
+    response = 'Use {braces} carefully: {"filename": "a", "code": "b"}'
+    assert parse_task_response(response) == ("a.html", "b")
+
+def test_json_after_think_block(parse_task_response):
+    response = '<think>\nMaybe {"filename": "wrong"}\n</think>\n{"filename": "todo.html", "code": "<ul></ul>"}'
+    assert parse_task_response(response) == ("todo.html", "<ul></ul>")
+
+def test_json_in_code_fence(parse_task_response):
+    response = '```json\n{"filename": "index.html", "code": "<h1>x</h1>"}\n```'
+    assert parse_task_response(response) == ("index.html", "<h1>x</h1>")
+
+def test_delimiter_fallback(parse_task_response):
+    response = "---FILENAME---\ncalculator.html\n---CODE---\n```html\n<body></body>\n```"
+    assert parse_task_response(response) == ("calculator.html", "<body></body>")
+
+def test_json_missing_fields_falls_back_to_delimiters(parse_task_response):
+    response = '{"name": "x"}\n---FILENAME---\nform\n---CODE---\n<form></form>'
+    assert parse_task_response(response) == ("form.html", "<form></form>")
+
+@pytest.mark.parametrize("response", [None, "", "I cannot help with that.", '{"filename": 3, "code": null}'])
+def test_unparseable_responses(parse_task_response, response):
+    assert parse_task_response(response) == (None, None)
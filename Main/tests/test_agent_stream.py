@@ -0,0 +1,72 @@
+import json
+
+# Minimal Recording with One Chat Reply for Every Prompt
+def recording(content, thinking=""):
+    return {"tags": {"models": []}, "pull": [{"status": "success"}], "chat": [{"match": "", "thinking": thinking, "content": content}]}
+
+# Stand-in for a requests Response Streaming the Given Chunks
+class StreamedResponse:
+    def __init__(self, chunks):
+        self.lines = [json.dumps(chunk).encode() for chunk in chunks]
+
+    def iter_lines(self):
+        return iter(self.lines)
+
+def chunk(content="", thinking=None, done=False, done_reason="stop"):
+    message = {"role": "assistant", "content": content}
+    if thinking is not None:
+        message["thinking"] = thinking
+    payload = {"message": message, "done": done}
+    if done:
+        payload["done_reason"] = done_reason
+    return payload
+
+def test_inline_think_block_is_stripped_and_counted(make_agent):
+    read_ollama_stream = make_agent()["read_ollama_stream"]
+    response = StreamedResponse([chunk("<think>"), chunk("plan "), chunk("</think>"), chunk("Hello "), chunk("world"), chunk(done=True)])
+    content, think_tokens, output_tokens, truncated, done_reason = read_ollama_stream(response)
+    assert content == "Hello world"
+    assert (think_tokens, output_tokens, truncated, done_reason) == (3, 2, False, "stop")
+
+def test_separate_thinking_field_is_counted(make_agent):
+    read_ollama_stream = make_agent()["read_ollama_stream"]
+    response = StreamedResponse([chunk(thinking="a "), chunk(thinking="b "), chunk("answer"), chunk(done=True)])
+    assert read_ollama_stream(response) == ("answer", 2, 1, False, "stop")
+
+def test_think_budget_cuts_the_stream(make_agent):
+    read_ollama_stream = make_agent()["read_ollama_stream"]
+    response = StreamedResponse([chunk(thinking="x ")] * 5 + [chunk("answer"), chunk(done=True)])
+    content, think_tokens, output_tokens, truncated, done_reason = read_ollama_stream(response, think_budget=3)
+    assert (content, think_tokens, truncated) == (None, 4, True)
+
+def test_budget_ignores_output_tokens(make_agent):
+    read_ollama_stream = make_agent()["read_ollama_stream"]
+    response = StreamedResponse([chunk(thinking="x "), chunk("a "), chunk("b "), chunk("c "), chunk(done=True)])
+    assert read_ollama_stream(response, think_budget=1) == ("a b c", 1, 3, False, "stop")
+
+def test_done_reason_length_is_reported(make_agent):
+    read_ollama_stream = make_agent()["read_ollama_stream"]
+    response = StreamedResponse([chunk("half a "), chunk(done=True, done_reason="length")])
+    assert read_ollama_stream(response)[4] == "length"
+
+def test_call_ollama_returns_content(make_agent):
+    agent = make_agent(recording("<h1>Hi</h1>", thinking="short plan"))
+    assert agent["call_ollama"]("prompt") == "<h1>Hi</h1>"
+
+def test_call_ollama_retries_without_thinking_over_budget(make_agent):
+    agent = make_agent(recording("<h1>Hi</h1>", thinking="word " * 50))
+    agent["THINK_TOKEN_BUDGET"] = 10
+    assert agent["call_ollama"]("prompt") == "<h1>Hi</h1>"
+    assert any("Retrying with thinking disabled" in message for message in agent["ui"].messages)
+
+def test_call_ollama_discards_replies_cut_at_num_predict(make_agent):
+    agent = make_agent(recording("<html><body>" + "<p>text</p> " * 50 + "</body></html>"))
+    assert agent["call_ollama"]("prompt", think=False, num_predict=10) is None
+    assert any("10-token limit" in message for message in agent["ui"].messages)
+
+def test_write_code_falls_back_when_reply_is_cut(make_agent, tmp_path):
+    agent = make_agent(recording("```\n" + "<p>text</p> " * 50 + "\n```"))
+    agent["CODE_NUM_PREDICT"] = 10
+    code = agent["write_code"]("Make a page", "page.html")
+    assert "Empty Page" in code
+    assert (tmp_path / "page.html").read_text() == code
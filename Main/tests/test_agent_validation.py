@@ -0,0 +1,46 @@
+import pytest
+
+from fake_ollama import load_recording
+
+BROKEN = "<!DOCTYPE html>\n<html><body><div><span>Chat</div></body></html>"
+FIXED = "<!DOCTYPE html>\n<html><body><div><span>Chat</span></div></body></html>"
+WORSE = "<!DOCTYPE html>\n<html><body><div id=\"a\"><p id=\"a\"><span>Chat</div></section></body></html>"
+
+# Recording whose repair prompt ("failed validation") gets the given reply
+def repair_recording(content):
+    recording = load_recording()
+    for entry in recording["chat"]:
+        if entry["match"] == "failed validation":
+            entry["content"] = content
+    return recording
+
+@pytest.fixture
+def saved_page(tmp_path):
+    page = tmp_path / "chat.html"
+    page.write_text(BROKEN)
+    return page
+
+def test_valid_page_is_kept_without_calling_the_model(make_agent, tmp_path):
+    agent = make_agent()
+    assert agent["validate_code"]("Chat", "chat.html", FIXED) == FIXED
+    assert not any("Raw code response" in message for message in agent["ui"].messages)
+    assert (tmp_path / "validation_log.jsonl").exists()
+
+def test_failed_regeneration_keeps_the_original(make_agent, saved_page):
+    agent = make_agent(repair_recording(f"```\n{FIXED}\n```"))
+    agent["CODE_NUM_PREDICT"] = 2
+    assert agent["validate_code"]("Chat", "chat.html", BROKEN) == BROKEN
+    assert saved_page.read_text() == BROKEN
+    assert "Keeping the original page" in agent["ui"].messages[-1]
+
+def test_worse_regeneration_keeps_the_original(make_agent, saved_page):
+    agent = make_agent(repair_recording(f"```\n{WORSE}\n```"))
+    assert agent["validate_code"]("Chat", "chat.html", BROKEN) == BROKEN
+    assert saved_page.read_text() == BROKEN
+    assert "has more problems" in agent["ui"].messages[-1]
+
+def test_fixed_regeneration_is_saved_without_relogging(make_agent, saved_page, tmp_path):
+    agent = make_agent(repair_recording(f"```\n{FIXED}\n```"))
+    assert agent["validate_code"]("Chat", "chat.html", BROKEN) == FIXED
+    assert saved_page.read_text() == FIXED
+    assert not (tmp_path / "task_log.txt").exists()
@@ -0,0 +1,80 @@
+import subprocess
+
+import pytest
+
+from conftest import SNAPSHOT_NAMES
+
+@pytest.fixture
+def agent(make_agent, tmp_path):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    agent = make_agent(names=SNAPSHOT_NAMES)
+    yield agent
+    agent["close_snapshots"]()
+
+def snapshot(agent, task, filename):
+    agent["queue_snapshot"](task, filename)
+    agent["SNAPSHOT_QUEUE"].join()
+
+def messages(agent):
+    drained = []
+    while not agent["SNAPSHOT_MESSAGES"].empty():
+        drained.append(agent["SNAPSHOT_MESSAGES"].get_nowait())
+    return drained
+
+def show(tmp_path, path):
+    return subprocess.run(["git", "show", f"agent-snapshots:{path}"], cwd=tmp_path, capture_output=True, text=True).stdout
+
+def test_contents_are_read_at_queue_time(agent, tmp_path):
+    page = tmp_path / "page.html"
+    page.write_text("one")
+    agent["queue_snapshot"]("First", "page.html")
+    page.write_text("two")
+    agent["SNAPSHOT_QUEUE"].join()
+    assert show(tmp_path, "page.html") == "one"
+
+def test_worker_reports_through_the_message_queue(agent, tmp_path):
+    (tmp_path / "page.html").write_text("one")
+    snapshot(agent, "First", "page.html")
+    assert agent["fake_root"].scheduled == []
+    assert messages(agent)[0].startswith("AI Agent: Snapshotted page.html as ")
+
+def test_rollback_restores_previous_contents(agent, tmp_path):
+    page = tmp_path / "page.html"
+    page.write_text("one")
+    snapshot(agent, "First", "page.html")
+    page.write_text("two")
+    snapshot(agent, "Second", "page.html")
+    agent["rollback_task"]("Second")
+    assert page.read_text() == "one"
+    agent["SNAPSHOT_QUEUE"].join()
+    agent["rollback_task"]("First")
+    assert not page.exists()
+
+def test_rollback_polls_while_snapshots_are_pending(agent):
+    agent["SNAPSHOT_QUEUE"].put(("Pending", "page.html", {}))
+    agent["rollback_task"]("Pending")
+    func, args = agent["fake_root"].scheduled.pop()
+    assert func is agent["rollback_task"] and args == ("Pending", True)
+    func(*args)
+    assert agent["ui"].messages.count("AI Agent: Waiting for pending snapshots...") == 1
+    agent["fake_root"].scheduled.clear()
+    agent["SNAPSHOT_QUEUE"].get_nowait()
+    agent["SNAPSHOT_QUEUE"].task_done()
+    func(*args)
+    assert agent["ui"].messages[-1] == "AI Agent: No snapshot found for task: Pending"
+
+def test_dead_fast_import_is_replaced(agent, tmp_path):
+    page = tmp_path / "page.html"
+    page.write_text("one")
+    snapshot(agent, "First", "page.html")
+    process = agent["GIT_STREAM"]["process"]
+    process.kill()
+    process.wait()
+    page.write_text("two")
+    snapshot(agent, "Second", "page.html")
+    assert agent["GIT_STREAM"]["process"] is None
+    snapshot(agent, "Third", "page.html")
+    assert "Failed to snapshot" in messages(agent)[1]
+    assert show(tmp_path, "page.html") == "two"
+    agent["rollback_task"]("Third")
+    assert page.read_text() == "one"
@@ -0,0 +1,110 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from validator import bracket_errors, check_css, check_html, js_syntax_check, record_validation, strip_js_literals, validate_site
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head><link rel="stylesheet" href="styles.css"></head>
+<body>
+<div id="app" class="card"><p>Hello</div>
+<script src="script.js"></script>
+</body>
+</html>"""
+
+@pytest.mark.parametrize("js", [
+    "const half = total / 2 / count;",
+    "x = a++ / 2; y = (b) / 3; z = arr[0] / 4;",
+    "if (/[)}]/.test(s)) { s = s.replace(/\\/\\(/g, ''); }",
+    "return /\\d+/.exec(s);",
+    "const t = `line ${a / b} (`;",
+    "// unbalanced ( in a comment\n/* and ] here */ f();"
+])
+def test_regex_and_division_are_told_apart(js):
+    wrapped = f"function f(s, a, b, arr, total, count) {{ {js} }}"
+    assert js_syntax_check(wrapped) == ([], [])
+    # The same code must also pass the fallback used for syntax esprima cannot parse
+    assert bracket_errors(strip_js_literals(wrapped)) == []
+
+def test_regex_literal_is_blanked():
+    assert strip_js_literals("s.split(/[(]/)") == "s.split(0)"
+
+def test_unterminated_string_is_an_error():
+    with pytest.raises(SyntaxError):
+        strip_js_literals("const s = 'open;\nf();")
+
+def test_esprima_errors_block():
+    errors, warnings = js_syntax_check("function f( { return 1; }")
+    assert errors and errors[0].startswith("JS syntax error: Line 1")
+    assert warnings == []
+
+def test_newer_syntax_falls_back_to_bracket_check():
+    errors, warnings = js_syntax_check("const name = user?.profile?.name ?? 'guest';")
+    assert errors == []
+    assert "newer than esprima supports" in warnings[0]
+
+def test_newer_syntax_fallback_skips_regex_brackets():
+    errors, warnings = js_syntax_check("const open = /[({]/.test(input?.value); const ratio = total / count;")
+    assert errors == [] and len(warnings) == 1
+
+def test_newer_syntax_with_unbalanced_brackets_blocks():
+    errors, warnings = js_syntax_check("if (user?.name) { greet(user;")
+    assert errors == ["JS syntax error: unclosed '('"]
+
+def test_optional_end_tags_are_accepted():
+    html = "<html><body><ul><li>One<li>Two</ul><p>First<p>Second<table><tr><td>1<td>2</table></body></html>"
+    assert check_html(html)["errors"] == []
+
+def test_unclosed_and_stray_tags():
+    errors = check_html(PAGE, available=("styles.css", "script.js"))["errors"]
+    assert errors == []
+    errors = check_html("<html><body><div><span>text</div></section></body></html>")["errors"]
+    assert "Unclosed <span> (line 1) before </div>" in errors
+    assert "Unexpected closing tag </section> (line 1)" in errors
+
+def test_duplicate_ids():
+    errors = check_html('<body><p id="a"></p><p id="a"></p></body>')["errors"]
+    assert errors == ["Duplicate id 'a' (line 1)"]
+
+def test_unresolved_and_missing_links():
+    errors = check_html(PAGE.replace("script.js", "app.js"), available=("styles.css", "script.js"), required=("styles.css", "script.js"))["errors"]
+    assert errors == ["Unresolved reference to 'app.js'", "'script.js' is never linked from the HTML"]
+
+def test_remote_references_are_ignored():
+    html = '<body><script src="https://cdn.example.com/lib.js"></script><link rel="stylesheet" href="//cdn.example.com/x.css"></body>'
+    assert check_html(html)["errors"] == []
+
+def test_selector_coverage():
+    css = ".card {} .nav {} .footer {} .hero {} .menu {}"
+    report = check_css(css, PAGE)
+    assert report["errors"] and report["errors"][0].startswith("Only 20% of class/id selectors match")
+    assert check_css(css, PAGE, js="el.classList.add('nav', 'footer')")["errors"] == []
+
+def test_css_brace_balance():
+    assert check_css("body { color: red; ", "<body></body>")["errors"] == ["CSS has unbalanced braces (1 '{' vs 0 '}')"]
+
+def test_validate_site_reports_by_section():
+    code = {"html": PAGE, "css": ".card { color: red; }", "js": "document.getElementById('app').onclick = () => {"}
+    report = validate_site(code, required=("styles.css", "script.js"))
+    assert not report["ok"]
+    assert report["errors"]["html"] == [] and report["errors"]["css"] == []
+    assert report["errors"]["js"]
+    assert report["metrics"]["elements"] == 7
+
+def test_pool_gives_the_same_report():
+    code = {"html": PAGE, "css": ".card {}", "js": "let x = 1 +;"}
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        pooled = validate_site(code, pool=pool)
+    direct = validate_site(code)
+    assert pooled["errors"] == direct["errors"] and pooled["warnings"] == direct["warnings"]
+
+def test_record_validation_appends_json_lines(tmp_path):
+    path = tmp_path / "validation_log.jsonl"
+    report = validate_site({"html": PAGE})
+    record_validation(report, "first", str(path))
+    record_validation(report, "second", str(path))
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [entry["site"] for entry in entries] == ["first", "second"]
+    assert entries[0]["ok"] is True
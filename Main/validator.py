@@ -0,0 +1,280 @@
+import re
+import json
+import time
+from html.parser import HTMLParser
+
+import esprima
+
+# Elements that never take a closing tag, and ones whose closing tag browsers infer
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+OPTIONAL_END_TAGS = {"html", "head", "body", "p", "li", "dt", "dd", "option", "optgroup", "tr", "td", "th", "thead", "tbody", "tfoot", "colgroup", "caption", "rb", "rt", "rp"}
+MIN_SELECTOR_COVERAGE = 0.25
+MIN_SELECTORS_FOR_COVERAGE = 4
+# Words after which "/" starts a regular expression rather than a division
+REGEX_PREFIX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "instanceof", "yield", "await"}
+# Post-ES2017 syntax esprima cannot parse: optional chaining, nullish coalescing, optional catch binding, private fields
+MODERN_JS_SYNTAX = re.compile(r"\?\.(?!\d)|\?\?|\bcatch\s*\{|#[A-Za-z_$]")
+
+# HTML Parser that Tracks Structure Errors and Page Metrics
+class SiteParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []
+        self.errors = []
+        self.elements = 0
+        self.max_depth = 0
+        self.ids = set()
+        self.classes = set()
+        self.refs = []
+        self.scripts = []
+        self.styles = []
+        self._capture = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        self.elements += 1
+        if attrs.get("id"):
+            if attrs["id"] in self.ids:
+                self.errors.append(f"Duplicate id '{attrs['id']}' (line {self.getpos()[0]})")
+            self.ids.add(attrs["id"])
+        self.classes.update((attrs.get("class") or "").split())
+        if tag == "link" and "stylesheet" in (attrs.get("rel") or "").lower() and attrs.get("href"):
+            self.refs.append(attrs["href"])
+        if tag == "script" and attrs.get("src"):
+            self.refs.append(attrs["src"])
+        if tag in ("script", "style") and not attrs.get("src"):
+            script_type = (attrs.get("type") or "text/javascript").lower()
+            if tag == "style" or "javascript" in script_type or script_type == "module":
+                self._capture = (tag, [])
+        if tag not in VOID_TAGS:
+            self.stack.append((tag, self.getpos()[0]))
+            self.max_depth = max(self.max_depth, len(self.stack))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.stack and self.stack[-1][0] == tag:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        if self._capture and self._capture[0] == tag:
+            (self.styles if tag == "style" else self.scripts).append("".join(self._capture[1]))
+            self._capture = None
+        open_tags = [name for name, _ in self.stack]
+        if tag not in open_tags:
+            self.errors.append(f"Unexpected closing tag </{tag}> (line {self.getpos()[0]})")
+            return
+        while self.stack:
+            name, line = self.stack.pop()
+            if name == tag:
+                break
+            if name not in OPTIONAL_END_TAGS:
+                self.errors.append(f"Unclosed <{name}> (line {line}) before </{tag}>")
+
+    def handle_data(self, data):
+        if self._capture:
+            self._capture[1].append(data)
+
+    def close(self):
+        super().close()
+        for name, line in self.stack:
+            if name not in OPTIONAL_END_TAGS:
+                self.errors.append(f"Unclosed <{name}> (line {line})")
+
+# Parse HTML into a SiteParser
+def parse_html(html):
+    parser = SiteParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+# Decide Whether a "/" Starts a Regex Literal from the Code Before It
+def starts_regex(prefix):
+    prefix = prefix.rstrip()
+    if not prefix:
+        return True
+    word = re.search(r"[A-Za-z_$][\w$]*$", prefix)
+    if word:
+        return word.group(0) in REGEX_PREFIX_KEYWORDS
+    if prefix.endswith(("++", "--")) or prefix[-1].isalnum() or prefix[-1] in ")]}$_":
+        return False
+    return True
+
+# Strip Comments, Strings and Regex Literals from JS so Brackets can be Balanced
+def strip_js_literals(js):
+    out = []
+    i, n = 0, len(js)
+    while i < n:
+        ch = js[i]
+        if js.startswith("//", i):
+            end = js.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        if js.startswith("/*", i):
+            end = js.find("*/", i + 2)
+            if end == -1:
+                raise SyntaxError("Unterminated comment")
+            i = end + 2
+            continue
+        if ch in "'\"`" or (ch == "/" and starts_regex("".join(out))):
+            quote = ch
+            start = i
+            in_class = False
+            i += 1
+            while i < n and (js[i] != quote or in_class):
+                if js[i] == "\\":
+                    i += 1
+                elif quote != "`" and js[i] == "\n":
+                    break
+                elif quote == "/" and js[i] in "[]":
+                    in_class = js[i] == "["
+                i += 1
+            if i >= n or js[i] != quote:
+                line = js.count("\n", 0, start) + 1
+                raise SyntaxError(f"Unterminated {'regular expression' if quote == '/' else 'string'} literal (line {line})")
+            i += 1
+            out.append("0")
+            continue
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+# Check Brackets Balance Once Comments, Strings and Regex Literals are Removed
+def bracket_errors(stripped):
+    pairs = {")": "(", "]": "[", "}": "{"}
+    stack = []
+    for index, ch in enumerate(stripped):
+        if ch in "([{":
+            stack.append(ch)
+        elif ch in pairs:
+            if not stack or stack.pop() != pairs[ch]:
+                return [f"JS syntax error: unbalanced '{ch}' (offset {index})"]
+    if stack:
+        return [f"JS syntax error: unclosed '{stack[-1]}'"]
+    return []
+
+# Check JS Syntax with esprima; scripts using newer syntax it cannot parse fall back to the bracket check
+def js_syntax_check(js):
+    if not js.strip():
+        return [], []
+    try:
+        esprima.parseScript(js, {"tolerant": False})
+        return [], []
+    except esprima.Error as e:
+        parse_error = f"JS syntax error: {e}"
+    try:
+        stripped = strip_js_literals(js)
+    except SyntaxError as e:
+        return [f"JS syntax error: {e}"], []
+    if not MODERN_JS_SYNTAX.search(stripped):
+        return [parse_error], []
+    errors = bracket_errors(stripped)
+    if errors:
+        return errors, []
+    return [], [f"Uses syntax newer than esprima supports; checked brackets and strings only ({parse_error})"]
+
+# Split CSS into Selector Lists, Skipping At-Rules and Keyframe Steps
+def css_selectors(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    selectors = []
+    for match in re.finditer(r"([^{};]+)\{", css):
+        prelude = match.group(1).strip()
+        if not prelude or prelude.startswith("@") or re.fullmatch(r"(from|to|[\d.]+%)(\s*,\s*(from|to|[\d.]+%))*", prelude):
+            continue
+        selectors.extend(part.strip() for part in prelude.split(",") if part.strip())
+    return selectors
+
+# Check HTML Structure and Local File References
+def check_html(html, available=(), required=()):
+    errors = []
+    if not html.strip():
+        return {"errors": ["HTML is empty"], "metrics": {}}
+    parser = parse_html(html)
+    errors.extend(parser.errors)
+    if "<body" not in html.lower():
+        errors.append("Missing <body> element")
+    local_refs = [ref.split("?")[0].split("#")[0].lstrip("./") for ref in parser.refs if not re.match(r"^(https?:)?//|^data:", ref)]
+    for ref in local_refs:
+        if ref not in available:
+            errors.append(f"Unresolved reference to '{ref}'")
+    for name in required:
+        if name not in local_refs:
+            errors.append(f"'{name}' is never linked from the HTML")
+    metrics = {
+        "html_bytes": len(html.encode("utf-8")),
+        "elements": parser.elements,
+        "max_depth": parser.max_depth,
+        "ids": len(parser.ids),
+        "classes": len(parser.classes)
+    }
+    return {"errors": errors, "metrics": metrics}
+
+# Check CSS Braces and how many Class/Id Selectors Match the Page
+def check_css(css, html, js=""):
+    parser = parse_html(html)
+    css = "\n".join([css] + parser.styles)
+    errors = []
+    stripped = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    if stripped.count("{") != stripped.count("}"):
+        errors.append(f"CSS has unbalanced braces ({stripped.count('{')} '{{' vs {stripped.count('}')} '}}')")
+    selectors = css_selectors(css)
+    names = set()
+    for selector in selectors:
+        names.update(re.findall(r"([.#][A-Za-z_-][\w-]*)", selector))
+    script_text = js + "\n".join(parser.scripts)
+    used = parser.ids | parser.classes | set(re.findall(r"[\w-]+", script_text))
+    covered = [name for name in names if name[1:] in used]
+    coverage = len(covered) / len(names) if names else 1.0
+    if len(names) >= MIN_SELECTORS_FOR_COVERAGE and coverage < MIN_SELECTOR_COVERAGE:
+        missing = sorted(set(names) - set(covered))[:5]
+        errors.append(f"Only {coverage:.0%} of class/id selectors match the page (e.g. {', '.join(missing)})")
+    metrics = {
+        "css_bytes": len(css.encode("utf-8")),
+        "css_rules": len(selectors),
+        "selector_coverage": round(coverage, 3)
+    }
+    return {"errors": errors, "metrics": metrics}
+
+# Check JS Syntax for the External Script and Inline <script> Blocks
+def check_js(js, html):
+    parser = parse_html(html)
+    errors, warnings = js_syntax_check(js)
+    for index, script in enumerate(parser.scripts):
+        script_errors, script_warnings = js_syntax_check(script)
+        errors.extend(f"Inline script {index + 1}: {error}" for error in script_errors)
+        warnings.extend(f"Inline script {index + 1}: {warning}" for warning in script_warnings)
+    script_text = "\n".join([js] + parser.scripts)
+    metrics = {
+        "js_bytes": len(script_text.encode("utf-8")),
+        "js_functions": len(re.findall(r"\bfunction\b|=>", script_text))
+    }
+    return {"errors": errors, "warnings": warnings, "metrics": metrics}
+
+# Validate a Generated Site, Fanning Checks out to a Process Pool When Given
+def validate_site(code, available=("styles.css", "script.js"), required=(), pool=None):
+    start = time.perf_counter()
+    html, css, js = code.get("html", ""), code.get("css", ""), code.get("js", "")
+    checks = {
+        "html": (check_html, (html, tuple(available), tuple(required))),
+        "css": (check_css, (css, html, js)),
+        "js": (check_js, (js, html))
+    }
+    if pool is not None:
+        futures = {section: pool.submit(func, *args) for section, (func, args) in checks.items()}
+        results = {section: future.result() for section, future in futures.items()}
+    else:
+        results = {section: func(*args) for section, (func, args) in checks.items()}
+    metrics = {}
+    for result in results.values():
+        metrics.update(result["metrics"])
+    metrics["validation_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    errors = {section: result["errors"] for section, result in results.items()}
+    warnings = [warning for result in results.values() for warning in result.get("warnings", [])]
+    return {"ok": not any(errors.values()), "errors": errors, "warnings": warnings, "metrics": metrics}
+
+# Append a Validation Report to a JSON-Lines Log
+def record_validation(report, label, path="validation_log.jsonl"):
+    entry = {"timestamp": time.time(), "site": label, "ok": report["ok"], "errors": report["errors"], "warnings": report["warnings"], "metrics": report["metrics"]}
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")